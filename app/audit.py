@@ -1,16 +1,91 @@
 from __future__ import annotations
 
-import json
+import atexit
 import os
+import threading
+import time
 from datetime import datetime, timezone
 from typing import Any, Dict
 
+import orjson
+
+
+class AuditWriter:
+    def __init__(
+        self,
+        path: str,
+        flush_every: int = 16,
+        flush_interval_s: float = 1.0,
+        buffer_size: int = 64 * 1024,
+    ) -> None:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._handle = open(path, "ab", buffering=buffer_size)
+        self._flush_every = max(1, flush_every)
+        self._flush_interval_s = flush_interval_s
+        self._unflushed = 0
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def write(self, record: Dict[str, Any]) -> None:
+        payload = {
+            "ts": datetime.now(timezone.utc).isoformat(),
+            **record,
+        }
+        line = orjson.dumps(payload, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NAIVE_UTC)
+        with self._lock:
+            self._handle.write(line)
+            self._unflushed += 1
+            now = time.monotonic()
+            if self._unflushed >= self._flush_every or now - self._last_flush >= self._flush_interval_s:
+                self._handle.flush()
+                self._unflushed = 0
+                self._last_flush = now
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._handle.closed:
+                self._handle.flush()
+            self._unflushed = 0
+            self._last_flush = time.monotonic()
+
+    def sync(self) -> None:
+        with self._lock:
+            self._handle.flush()
+            self._unflushed = 0
+            self._last_flush = time.monotonic()
+            fileno = self._handle.fileno()
+        os.fsync(fileno)
+
+    def close(self) -> None:
+        with self._lock:
+            if not self._handle.closed:
+                self._handle.close()
+
+
+_writers: Dict[str, AuditWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_audit_writer(path: str) -> AuditWriter:
+    writer = _writers.get(path)
+    if writer is None:
+        with _writers_lock:
+            writer = _writers.get(path)
+            if writer is None:
+                writer = AuditWriter(path)
+                _writers[path] = writer
+    return writer
+
+
+def close_audit_writers() -> None:
+    with _writers_lock:
+        for writer in _writers.values():
+            writer.close()
+        _writers.clear()
+
+
+atexit.register(close_audit_writers)
+
 
 def write_audit_log(path: str, record: Dict[str, Any]) -> None:
-    os.makedirs(os.path.dirname(path), exist_ok=True)
-    payload = {
-        "ts": datetime.now(timezone.utc).isoformat(),
-        **record,
-    }
-    with open(path, "a", encoding="utf-8") as handle:
-        handle.write(json.dumps(payload, ensure_ascii=True) + "\n")
+    get_audit_writer(path).write(record)
@@ -1,35 +1,49 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import importlib
 import json
-import os
 import time
 import uuid
 from datetime import datetime, timezone
+from functools import lru_cache
 from types import SimpleNamespace
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
-import requests
+import httpx
 from pydantic import BaseModel, Field
 
-from app.audit import write_audit_log
 from app.config import Settings
-from app.idempotency import IdempotencyStore
-from app.models import (
-    AutomationFixSuggested,
-    AutomationFlowDefined,
-    AutomationSimplificationRecommended,
-)
+from app.http_client import get_http_client
+from app.idempotency import get_idempotency_store
+from app.models import EventDraftDict
 from app.openai_brain import generate_fix, generate_flow, generate_simplification
+from app.persistence import PersistenceBatch
 from app.planner import build_fix, build_flow, build_simplification
-from app.publisher import MaestroPublisher
+from app.publisher import PUBLISH_SKIPPED, get_publisher
 from app.utils import model_validate
 
 
 SUPPORTED_EVENTS = {"AUTOMATION_REQUEST", "AUTOMATION_ERROR_DETECTED"}
 
+_in_flight_keys: Set[str] = set()
 
-def _load_dma_rules() -> Any:
+
+def _canonical_payload(payload: Dict[str, Any]) -> str:
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=True)
+
+
+@lru_cache(maxsize=1024)
+def _fallback_action_key(event_name: str, trace_id: str, canonical: str, key_hash: str) -> str:
+    base = f"{event_name}|{trace_id}|{canonical}"
+    if key_hash == "blake2b":
+        return hashlib.blake2b(base.encode("utf-8"), digest_size=16).hexdigest()
+    return uuid.uuid5(uuid.NAMESPACE_URL, base).hex
+
+
+@lru_cache(maxsize=2)
+def _load_dma_rules(key_hash: str = "uuid5") -> Any:
     try:
         return importlib.import_module("dma_rules")
     except ModuleNotFoundError as exc:
@@ -60,9 +74,7 @@ def _load_dma_rules() -> Any:
             duration_ms: int = 0
 
         def action_key(event_name: str, trace_id: str, payload: Dict[str, Any]) -> str:
-            canonical = json.dumps(payload, sort_keys=True, separators=(",", ":"), ensure_ascii=True)
-            base = f"{event_name}|{trace_id}|{canonical}"
-            return uuid.uuid5(uuid.NAMESPACE_URL, base).hex
+            return _fallback_action_key(event_name, trace_id, _canonical_payload(payload), key_hash)
 
         return SimpleNamespace(Event=Event, EventDraft=EventDraft, AgentResult=AgentResult, action_key=action_key)
 
@@ -90,16 +102,15 @@ def _build_event_draft(
     location_id: str,
     source: str,
     payload: Dict[str, Any],
-) -> Dict[str, Any]:
-    enriched_payload = dict(payload)
-    if trace_id and "trace_id" not in enriched_payload:
-        enriched_payload["trace_id"] = trace_id
+) -> EventDraftDict:
+    if trace_id and "trace_id" not in payload:
+        payload = {**payload, "trace_id": trace_id}
     return {
         "name": name,
         "source": source,
         "location_id": location_id,
         "contact_id": contact_id,
-        "payload": enriched_payload,
+        "payload": payload,
     }
 
 
@@ -110,10 +121,11 @@ def _build_agent_result(
     trace_id: str,
     event_id: str,
     status: str,
-    next_events: List[Dict[str, Any]],
+    next_events: List[EventDraftDict],
     evidence: Dict[str, Any],
     errors: Optional[List[str]] = None,
     duration_ms: int = 0,
+    validate: bool = True,
 ) -> Dict[str, Any]:
     payload = {
         "trace_id": trace_id,
@@ -125,6 +137,8 @@ def _build_agent_result(
         "errors": errors or [],
         "duration_ms": duration_ms,
     }
+    if not validate:
+        return payload
     model = getattr(dma_rules, "AgentResult", None)
     if model is None:
         raise RuntimeError("dma_rules.AgentResult not found")
@@ -132,19 +146,20 @@ def _build_agent_result(
     return payload
 
 
-def _persist_report(reports_dir: str, trace_id: str, payload: Dict[str, Any]) -> str:
-    os.makedirs(reports_dir, exist_ok=True)
-    path = os.path.join(reports_dir, f"automation_{trace_id}.json")
-    with open(path, "w", encoding="utf-8") as handle:
-        json.dump(payload, handle, ensure_ascii=True, indent=2)
-    return path
-
-
 def _build_context_text(context: Dict[str, Any]) -> str:
     return "\n".join(f"{k}: {v}" for k, v in context.items())
 
 
-def _send_via_make(settings: Settings, payload: Dict[str, Any]) -> Dict[str, Any]:
+async def _read_response_prefix(response: httpx.Response, limit: int = 500) -> str:
+    buffer = bytearray()
+    async for chunk in response.aiter_bytes():
+        buffer += chunk
+        if len(buffer) >= limit:
+            break
+    return buffer[:limit].decode("utf-8", errors="replace")
+
+
+async def _send_via_make(client: httpx.AsyncClient, settings: Settings, payload: Dict[str, Any]) -> Dict[str, Any]:
     if not settings.make_webhook_url:
         return {"attempted": False, "provider": "MAKE", "success": False, "reason": "missing_make_webhook_url"}
 
@@ -153,24 +168,19 @@ def _send_via_make(settings: Settings, payload: Dict[str, Any]) -> Dict[str, Any
         headers["Authorization"] = f"Bearer {settings.make_webhook_token}"
 
     try:
-        response = requests.post(
-            settings.make_webhook_url,
-            json=payload,
-            headers=headers,
-            timeout=settings.request_timeout,
-        )
-        return {
-            "attempted": True,
-            "provider": "MAKE",
-            "success": response.status_code < 400,
-            "status_code": response.status_code,
-            "response": response.text[:500],
-        }
-    except requests.RequestException as exc:
+        async with client.stream("POST", settings.make_webhook_url, json=payload, headers=headers) as response:
+            return {
+                "attempted": True,
+                "provider": "MAKE",
+                "success": response.status_code < 400,
+                "status_code": response.status_code,
+                "response": await _read_response_prefix(response),
+            }
+    except httpx.HTTPError as exc:
         return {"attempted": True, "provider": "MAKE", "success": False, "error": str(exc)}
 
 
-def _send_via_ghl(settings: Settings, payload: Dict[str, Any]) -> Dict[str, Any]:
+async def _send_via_ghl(client: httpx.AsyncClient, settings: Settings, payload: Dict[str, Any]) -> Dict[str, Any]:
     if not settings.ghl_token:
         return {"attempted": False, "provider": "GHL", "success": False, "reason": "missing_ghl_token"}
 
@@ -198,16 +208,16 @@ def _send_via_ghl(settings: Settings, payload: Dict[str, Any]) -> Dict[str, Any]
     }
 
     try:
-        response = requests.post(url, json=body, headers=headers, timeout=settings.request_timeout)
-        return {
-            "attempted": True,
-            "provider": "GHL",
-            "success": response.status_code < 400,
-            "status_code": response.status_code,
-            "response": response.text[:500],
-            "url": url,
-        }
-    except requests.RequestException as exc:
+        async with client.stream("POST", url, json=body, headers=headers) as response:
+            return {
+                "attempted": True,
+                "provider": "GHL",
+                "success": response.status_code < 400,
+                "status_code": response.status_code,
+                "response": await _read_response_prefix(response),
+                "url": url,
+            }
+    except httpx.HTTPError as exc:
         return {
             "attempted": True,
             "provider": "GHL",
@@ -217,7 +227,36 @@ def _send_via_ghl(settings: Settings, payload: Dict[str, Any]) -> Dict[str, Any]
         }
 
 
-def _dispatch_outbound_message(settings: Settings, event_dict: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
+async def _send_hedged(
+    client: httpx.AsyncClient, settings: Settings, payload: Dict[str, Any]
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    make_task = asyncio.create_task(_send_via_make(client, settings, payload))
+    done, _ = await asyncio.wait({make_task}, timeout=settings.outbound_hedge_ms / 1000)
+    if done:
+        make_result = make_task.result()
+        if make_result.get("success"):
+            return make_result, {"attempted": False, "provider": "GHL", "success": False, "reason": "make_succeeded"}
+        return make_result, await _send_via_ghl(client, settings, payload)
+
+    ghl_task = asyncio.create_task(_send_via_ghl(client, settings, payload))
+    pending = {make_task, ghl_task}
+    while pending:
+        done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+        if any(task.result().get("success") for task in done):
+            break
+    for task in pending:
+        task.cancel()
+
+    results = []
+    for task, provider in ((make_task, "MAKE"), (ghl_task, "GHL")):
+        if task in pending:
+            results.append({"attempted": True, "provider": provider, "success": False, "reason": "hedge_cancelled"})
+        else:
+            results.append(task.result())
+    return results[0], results[1]
+
+
+async def _dispatch_outbound_message(settings: Settings, event_dict: Dict[str, Any], context: Dict[str, Any]) -> Dict[str, Any]:
     message_text = str(context.get("message_text") or context.get("text") or "").strip()
     contact_id = event_dict.get("contact_id")
     location_id = event_dict.get("location_id")
@@ -242,11 +281,17 @@ def _dispatch_outbound_message(settings: Settings, event_dict: Dict[str, Any], c
         "source": context.get("source") or event_dict.get("name"),
     }
 
-    make_result = _send_via_make(settings, outbound_payload)
-    if make_result.get("success"):
-        return {"attempted": True, "success": True, "provider": "MAKE", "details": make_result}
+    client = get_http_client(settings)
+    if settings.outbound_hedge_ms > 0:
+        make_result, ghl_result = await _send_hedged(client, settings, outbound_payload)
+        if make_result.get("success"):
+            return {"attempted": True, "success": True, "provider": "MAKE", "details": make_result}
+    else:
+        make_result = await _send_via_make(client, settings, outbound_payload)
+        if make_result.get("success"):
+            return {"attempted": True, "success": True, "provider": "MAKE", "details": make_result}
+        ghl_result = await _send_via_ghl(client, settings, outbound_payload)
 
-    ghl_result = _send_via_ghl(settings, outbound_payload)
     if ghl_result.get("success"):
         return {"attempted": True, "success": True, "provider": "GHL", "details": ghl_result}
 
@@ -259,9 +304,9 @@ def _dispatch_outbound_message(settings: Settings, event_dict: Dict[str, Any], c
     }
 
 
-def handle_event(settings: Settings, event_data: Dict[str, Any]) -> Dict[str, Any]:
+async def handle_event(settings: Settings, event_data: Dict[str, Any]) -> Dict[str, Any]:
     start_time = time.perf_counter()
-    dma_rules = _load_dma_rules()
+    dma_rules = _load_dma_rules(settings.idempotency_key_hash)
     event_model = getattr(dma_rules, "Event", None)
     if event_model is None:
         raise RuntimeError("dma_rules.Event not found")
@@ -280,6 +325,7 @@ def handle_event(settings: Settings, event_data: Dict[str, Any]) -> Dict[str, An
             next_events=[],
             evidence={"reason": "unsupported_event", "summary": "Evento nao suportado."},
             duration_ms=duration_ms,
+            validate=False,
         )
 
     action_key = dma_rules.action_key(
@@ -288,8 +334,8 @@ def handle_event(settings: Settings, event_data: Dict[str, Any]) -> Dict[str, An
         event_dict.get("payload", {}),
     )
 
-    idempotency = IdempotencyStore(settings.data_dir)
-    if idempotency.is_processed(action_key):
+    idempotency = get_idempotency_store(settings.data_dir)
+    if action_key in _in_flight_keys or idempotency.is_processed(action_key):
         duration_ms = int((time.perf_counter() - start_time) * 1000)
         return _build_agent_result(
             dma_rules=dma_rules,
@@ -300,30 +346,50 @@ def handle_event(settings: Settings, event_data: Dict[str, Any]) -> Dict[str, An
             next_events=[],
             evidence={"reason": "idempotent", "summary": "Evento ja processado."},
             duration_ms=duration_ms,
+            validate=False,
         )
 
+    _in_flight_keys.add(action_key)
+    try:
+        return await _process_event(settings, dma_rules, event_dict, event_name, action_key, start_time)
+    finally:
+        _in_flight_keys.discard(action_key)
+
+
+async def _process_event(
+    settings: Settings,
+    dma_rules: Any,
+    event_dict: Dict[str, Any],
+    event_name: str,
+    action_key: str,
+    start_time: float,
+) -> Dict[str, Any]:
     payload = event_dict.get("payload", {})
-    context = dict(payload)
+    context = payload
 
     now_iso = datetime.now(timezone.utc).isoformat()
-    publisher = MaestroPublisher(settings.maestro_base_url)
-    next_events: List[Dict[str, Any]] = []
+    publisher = get_publisher(settings.maestro_base_url)
+    next_events: List[EventDraftDict] = []
 
     if event_name == "AUTOMATION_REQUEST":
-        delivery_result = _dispatch_outbound_message(settings, event_dict, context)
-        flow = build_flow(context)
         if settings.brain_enabled and settings.openai_api_key:
-            flow = generate_flow(settings, context=_build_context_text(context))
-
-        flow_payload = AutomationFlowDefined(
-            request_id=str(context.get("request_id") or ""),
-            workflow_summary=flow.workflow_summary,
-            triggers=flow.triggers,
-            conditions=flow.conditions,
-            actions=flow.actions,
-            systems_used=flow.systems_used,
-            timestamp=now_iso,
-        ).model_dump()
+            delivery_result, flow = await asyncio.gather(
+                _dispatch_outbound_message(settings, event_dict, context),
+                asyncio.to_thread(generate_flow, settings, context=_build_context_text(context)),
+            )
+        else:
+            delivery_result = await _dispatch_outbound_message(settings, event_dict, context)
+            flow = build_flow(context)
+
+        flow_payload = {
+            "request_id": str(context.get("request_id") or ""),
+            "workflow_summary": flow.workflow_summary,
+            "triggers": flow.triggers,
+            "conditions": flow.conditions,
+            "actions": flow.actions,
+            "systems_used": flow.systems_used,
+            "timestamp": now_iso,
+        }
         flow_draft = _build_event_draft(
             name="AUTOMATION_FLOW_DEFINED",
             trace_id=event_dict.get("trace_id", ""),
@@ -333,11 +399,12 @@ def handle_event(settings: Settings, event_data: Dict[str, Any]) -> Dict[str, An
             payload=flow_payload,
         )
         if _event_name_allowed(dma_rules, "AUTOMATION_FLOW_DEFINED"):
-            publisher.publish_event(flow_draft, dma_rules)
-            next_events.append(flow_draft)
+            published = await publisher.publish_event(flow_draft, dma_rules, dedup_scope=action_key)
+            if published is not PUBLISH_SKIPPED:
+                next_events.append(flow_draft)
 
-        report_path = _persist_report(
-            settings.reports_dir,
+        persistence = PersistenceBatch(settings)
+        report_path = persistence.add_report(
             event_dict.get("trace_id", ""),
             {
                 "trace_id": event_dict.get("trace_id", ""),
@@ -347,9 +414,7 @@ def handle_event(settings: Settings, event_data: Dict[str, Any]) -> Dict[str, An
                 "delivery_result": delivery_result,
             },
         )
-
-        write_audit_log(
-            settings.audit_log_path,
+        persistence.add_audit(
             {
                 "trace_id": event_dict.get("trace_id", ""),
                 "action": "automation_flow_defined",
@@ -358,8 +423,8 @@ def handle_event(settings: Settings, event_data: Dict[str, Any]) -> Dict[str, An
                 "event": event_dict.get("name"),
             },
         )
-
-        idempotency.mark_processed(action_key)
+        persistence.add_processed(action_key)
+        await asyncio.to_thread(persistence.commit)
 
         duration_ms = int((time.perf_counter() - start_time) * 1000)
         return _build_agent_result(
@@ -373,19 +438,23 @@ def handle_event(settings: Settings, event_data: Dict[str, Any]) -> Dict[str, An
             duration_ms=duration_ms,
         )
 
-    fix = build_fix(context)
-    simplification = build_simplification(context)
     if settings.brain_enabled and settings.openai_api_key:
-        fix = generate_fix(settings, context=_build_context_text(context))
-        simplification = generate_simplification(settings, context=_build_context_text(context))
-
-    fix_payload = AutomationFixSuggested(
-        error_id=str(context.get("error_id") or ""),
-        root_cause=fix.root_cause,
-        suggested_fix=fix.suggested_fix,
-        priority=fix.priority,
-        timestamp=now_iso,
-    ).model_dump()
+        context_text = _build_context_text(context)
+        fix, simplification = await asyncio.gather(
+            asyncio.to_thread(generate_fix, settings, context=context_text),
+            asyncio.to_thread(generate_simplification, settings, context=context_text),
+        )
+    else:
+        fix = build_fix(context)
+        simplification = build_simplification(context)
+
+    fix_payload = {
+        "error_id": str(context.get("error_id") or ""),
+        "root_cause": fix.root_cause,
+        "suggested_fix": fix.suggested_fix,
+        "priority": fix.priority,
+        "timestamp": now_iso,
+    }
     fix_draft = _build_event_draft(
         name="AUTOMATION_FIX_SUGGESTED",
         trace_id=event_dict.get("trace_id", ""),
@@ -395,15 +464,16 @@ def handle_event(settings: Settings, event_data: Dict[str, Any]) -> Dict[str, An
         payload=fix_payload,
     )
     if _event_name_allowed(dma_rules, "AUTOMATION_FIX_SUGGESTED"):
-        publisher.publish_event(fix_draft, dma_rules)
-        next_events.append(fix_draft)
-
-    simplification_payload = AutomationSimplificationRecommended(
-        area=simplification.area,
-        issue=simplification.issue,
-        recommendation=simplification.recommendation,
-        timestamp=now_iso,
-    ).model_dump()
+        published = await publisher.publish_event(fix_draft, dma_rules, dedup_scope=action_key)
+        if published is not PUBLISH_SKIPPED:
+            next_events.append(fix_draft)
+
+    simplification_payload = {
+        "area": simplification.area,
+        "issue": simplification.issue,
+        "recommendation": simplification.recommendation,
+        "timestamp": now_iso,
+    }
     simplification_draft = _build_event_draft(
         name="AUTOMATION_SIMPLIFICATION_RECOMMENDED",
         trace_id=event_dict.get("trace_id", ""),
@@ -413,11 +483,12 @@ def handle_event(settings: Settings, event_data: Dict[str, Any]) -> Dict[str, An
         payload=simplification_payload,
     )
     if _event_name_allowed(dma_rules, "AUTOMATION_SIMPLIFICATION_RECOMMENDED"):
-        publisher.publish_event(simplification_draft, dma_rules)
-        next_events.append(simplification_draft)
+        published = await publisher.publish_event(simplification_draft, dma_rules, dedup_scope=action_key)
+        if published is not PUBLISH_SKIPPED:
+            next_events.append(simplification_draft)
 
-    report_path = _persist_report(
-        settings.reports_dir,
+    persistence = PersistenceBatch(settings)
+    report_path = persistence.add_report(
         event_dict.get("trace_id", ""),
         {
             "trace_id": event_dict.get("trace_id", ""),
@@ -429,9 +500,7 @@ def handle_event(settings: Settings, event_data: Dict[str, Any]) -> Dict[str, An
             "payload": payload,
         },
     )
-
-    write_audit_log(
-        settings.audit_log_path,
+    persistence.add_audit(
         {
             "trace_id": event_dict.get("trace_id", ""),
             "action": "automation_fix_suggested",
@@ -440,8 +509,8 @@ def handle_event(settings: Settings, event_data: Dict[str, Any]) -> Dict[str, An
             "event": event_dict.get("name"),
         },
     )
-
-    idempotency.mark_processed(action_key)
+    persistence.add_processed(action_key)
+    await asyncio.to_thread(persistence.commit)
 
     duration_ms = int((time.perf_counter() - start_time) * 1000)
     evidence = {"report_path": report_path, **fix_payload}
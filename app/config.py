@@ -1,5 +1,6 @@
 import os
 from dataclasses import dataclass
+from functools import lru_cache
 
 from dotenv import load_dotenv
 
@@ -23,7 +24,10 @@ class Settings:
     audit_log_path: str
     reports_dir: str
     data_dir: str
+    idempotency_key_hash: str
+    persist_fsync: bool
     request_timeout: int
+    outbound_hedge_ms: int
     make_webhook_url: str
     make_webhook_token: str
     ghl_base_url: str
@@ -45,6 +49,7 @@ def _get_env_bool(name: str, default: str) -> bool:
     return value in {"1", "true", "yes", "y", "on"}
 
 
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
     base_dir = os.path.dirname(os.path.dirname(__file__))
     data_dir = os.path.join(base_dir, "data")
@@ -65,7 +70,10 @@ def get_settings() -> Settings:
         audit_log_path=os.path.join(data_dir, "audit.jsonl"),
         reports_dir=reports_dir,
         data_dir=data_dir,
+        persist_fsync=_get_env_bool("PERSIST_FSYNC", "false"),
+        idempotency_key_hash=os.getenv("IDEMPOTENCY_KEY_HASH", "uuid5").strip().lower(),
         request_timeout=_get_env_int("REQUEST_TIMEOUT", "20"),
+        outbound_hedge_ms=_get_env_int("OUTBOUND_HEDGE_MS", "0"),
         make_webhook_url=os.getenv("MAKE_WEBHOOK_URL", "").strip(),
         make_webhook_token=os.getenv("MAKE_WEBHOOK_TOKEN", "").strip(),
         ghl_base_url=os.getenv("GHL_BASE_URL", "https://services.leadconnectorhq.com").strip(),
@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+from typing import Optional
+
+import httpx
+
+from app.config import Settings
+
+
+_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client(settings: Settings) -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(
+            timeout=httpx.Timeout(settings.request_timeout, connect=2.0),
+            transport=httpx.AsyncHTTPTransport(
+                retries=3,
+                limits=httpx.Limits(max_connections=64, max_keepalive_connections=32),
+            ),
+        )
+    return _client
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
@@ -1,31 +1,73 @@
 from __future__ import annotations
 
-import json
 import os
-from typing import Dict
+import threading
+from functools import lru_cache
+from typing import BinaryIO, Optional, Set
+
+import orjson
 
 
 class IdempotencyStore:
     def __init__(self, data_dir: str) -> None:
-        self._path = os.path.join(data_dir, "idempotency.json")
-        self._cache: Dict[str, bool] = {}
+        self._path = os.path.join(data_dir, "idempotency.log")
+        self._legacy_path = os.path.join(data_dir, "idempotency.json")
+        self._cache: Set[str] = set()
+        self._pending = b""
+        self._lock = threading.Lock()
+        self._reader: Optional[BinaryIO] = None
+        self._writer: Optional[BinaryIO] = None
         self._load()
 
     def _load(self) -> None:
-        if not os.path.exists(self._path):
-            self._cache = {}
-            return
-        with open(self._path, "r", encoding="utf-8") as handle:
-            self._cache = json.load(handle)
-
-    def _save(self) -> None:
+        if os.path.exists(self._legacy_path):
+            with open(self._legacy_path, "rb") as handle:
+                self._cache.update(key for key, done in orjson.loads(handle.read()).items() if done)
         os.makedirs(os.path.dirname(self._path), exist_ok=True)
-        with open(self._path, "w", encoding="utf-8") as handle:
-            json.dump(self._cache, handle, ensure_ascii=True, indent=2)
+        self._writer = open(self._path, "ab")
+        self._reader = open(self._path, "rb")
+        self._refresh()
+
+    def _refresh(self) -> None:
+        chunk = self._reader.read()
+        if not chunk:
+            return
+        data = self._pending + chunk
+        complete, _, self._pending = data.rpartition(b"\n")
+        if complete:
+            self._cache.update(line.decode("utf-8") for line in complete.split(b"\n") if line)
 
     def is_processed(self, action_key: str) -> bool:
-        return self._cache.get(action_key, False)
+        with self._lock:
+            if action_key in self._cache:
+                return True
+            self._refresh()
+            return action_key in self._cache
 
     def mark_processed(self, action_key: str) -> None:
-        self._cache[action_key] = True
-        self._save()
+        with self._lock:
+            if action_key in self._cache:
+                return
+            self._cache.add(action_key)
+            self._writer.write(action_key.encode("utf-8") + b"\n")
+            self._writer.flush()
+
+    def sync(self) -> None:
+        with self._lock:
+            if self._writer is None:
+                return
+            fileno = self._writer.fileno()
+        os.fsync(fileno)
+
+    def close(self) -> None:
+        with self._lock:
+            for handle in (self._writer, self._reader):
+                if handle is not None:
+                    handle.close()
+            self._writer = None
+            self._reader = None
+
+
+@lru_cache(maxsize=None)
+def get_idempotency_store(data_dir: str) -> IdempotencyStore:
+    return IdempotencyStore(data_dir)
@@ -1,11 +1,34 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
 from fastapi import Depends, FastAPI, HTTPException
 
+from app.audit import close_audit_writers
 from app.automation_integrations_agent import handle_event
-from app.config import get_settings
+from app.config import Settings, get_settings
+from app.http_client import close_http_client, get_http_client
 from app.models import Capability
-from app.security import verify_internal_key
+from app.publisher import close_publishers
+from app.security import init_internal_key, verify_internal_key
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    get_http_client(get_settings())
+    init_internal_key()
+    try:
+        yield
+    finally:
+        await close_http_client()
+        await close_publishers()
+        close_audit_writers()
+
+
+async def _current_settings() -> Settings:
+    return get_settings()
+
 
-app = FastAPI(title="automation_integrations_ai", version="1.0.0")
+app = FastAPI(title="automation_integrations_ai", version="1.0.0", lifespan=lifespan)
 
 
 @app.get("/health")
@@ -14,8 +37,7 @@ async def health() -> dict:
 
 
 @app.get("/capabilities")
-async def capabilities() -> Capability:
-    settings = get_settings()
+async def capabilities(settings: Settings = Depends(_current_settings)) -> Capability:
     return Capability(
         agent_name=settings.agent_name,
         mode=settings.agent_mode,
@@ -29,10 +51,9 @@ async def capabilities() -> Capability:
 
 
 @app.post("/handle_event", dependencies=[Depends(verify_internal_key)])
-async def handle_event_route(event: dict) -> dict:
-    settings = get_settings()
+async def handle_event_route(event: dict, settings: Settings = Depends(_current_settings)) -> dict:
     try:
-        return handle_event(settings, event)
+        return await handle_event(settings, event)
     except ValueError as exc:
         raise HTTPException(status_code=400, detail=str(exc)) from exc
     except Exception as exc:
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
-from typing import List, Literal
+from typing import Any, Dict, List, Literal, Optional, TypedDict
 
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 
 
 Context = Literal["PROSPECT", "COMERCIAL", "ENTREGA", "OPERACAO"]
@@ -13,6 +13,8 @@ IssueType = Literal["EXCESSO_AUTOMACAO", "FALHA_RECORRENTE"]
 
 
 class AutomationFlowOutput(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     workflow_summary: str
     triggers: List[str]
     conditions: List[str]
@@ -21,12 +23,16 @@ class AutomationFlowOutput(BaseModel):
 
 
 class AutomationFixOutput(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     root_cause: str
     suggested_fix: str
     priority: Priority
 
 
 class AutomationSimplificationOutput(BaseModel):
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
     area: Context
     issue: IssueType
     recommendation: str
@@ -57,6 +63,14 @@ class AutomationSimplificationRecommended(BaseModel):
     timestamp: str
 
 
+class EventDraftDict(TypedDict):
+    name: str
+    source: str
+    location_id: str
+    contact_id: Optional[str]
+    payload: Dict[str, Any]
+
+
 class Capability(BaseModel):
     agent_name: str
     mode: str
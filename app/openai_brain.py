@@ -1,40 +1,48 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from functools import lru_cache
+from typing import Any, Dict, Type, TypeVar
 
 from openai import OpenAI
+from pydantic import BaseModel
 
 from app.config import Settings
 from app.models import AutomationFixOutput, AutomationFlowOutput, AutomationSimplificationOutput
 from app.prompts import SYSTEM_PROMPT, build_user_prompt
 
 
+T = TypeVar("T", bound=BaseModel)
+
+_SYSTEM_MESSAGE = {"role": "system", "content": SYSTEM_PROMPT}
+
+
 def _enforce_no_additional_properties(schema: Any) -> None:
-    if isinstance(schema, dict):
-        if schema.get("type") == "object":
-            schema.setdefault("additionalProperties", False)
-            properties = schema.get("properties", {})
+    stack = [schema]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(node)
+            continue
+        if not isinstance(node, dict):
+            continue
+
+        get = node.get
+        if get("type") == "object":
+            node.setdefault("additionalProperties", False)
+            properties = get("properties", {})
             if isinstance(properties, dict):
-                schema["required"] = list(properties.keys())
-                for prop_schema in properties.values():
-                    _enforce_no_additional_properties(prop_schema)
+                node["required"] = list(properties)
+                stack.extend(properties.values())
 
         for key in ("items", "anyOf", "allOf", "oneOf", "not"):
-            value = schema.get(key)
-            if isinstance(value, list):
-                for entry in value:
-                    _enforce_no_additional_properties(entry)
-            elif isinstance(value, dict):
-                _enforce_no_additional_properties(value)
+            value = get(key)
+            if isinstance(value, (dict, list)):
+                stack.append(value)
 
         for defs_key in ("$defs", "definitions"):
-            defs = schema.get(defs_key)
+            defs = get(defs_key)
             if isinstance(defs, dict):
-                for entry in defs.values():
-                    _enforce_no_additional_properties(entry)
-    elif isinstance(schema, list):
-        for entry in schema:
-            _enforce_no_additional_properties(entry)
+                stack.extend(defs.values())
 
 
 def _build_json_schema(model: Any) -> Dict[str, Any]:
@@ -47,52 +55,38 @@ def _build_json_schema(model: Any) -> Dict[str, Any]:
     }
 
 
-def generate_flow(settings: Settings, *, context: str) -> AutomationFlowOutput:
-    client = OpenAI(api_key=settings.openai_api_key)
-    json_schema = _build_json_schema(AutomationFlowOutput)
+_FLOW_SCHEMA = _build_json_schema(AutomationFlowOutput)
+_FIX_SCHEMA = _build_json_schema(AutomationFixOutput)
+_SIMPLIFICATION_SCHEMA = _build_json_schema(AutomationSimplificationOutput)
+
+
+@lru_cache(maxsize=4)
+def _get_client(api_key: str) -> OpenAI:
+    return OpenAI(api_key=api_key)
+
+
+def _generate_structured(settings: Settings, model: Type[T], json_schema: Dict[str, Any], context: str) -> T:
+    client = _get_client(settings.openai_api_key)
     response = client.responses.create(
         model=settings.openai_model,
         temperature=settings.openai_temperature,
         max_output_tokens=settings.openai_max_output_tokens,
         input=[
-            {"role": "system", "content": SYSTEM_PROMPT},
+            _SYSTEM_MESSAGE,
             {"role": "user", "content": build_user_prompt(context)},
         ],
         text={"format": {"type": "json_schema", **json_schema}},
     )
-    output_text = response.output_text
-    return AutomationFlowOutput.model_validate_json(output_text)
+    return model.model_validate_json(response.output_text)
+
+
+def generate_flow(settings: Settings, *, context: str) -> AutomationFlowOutput:
+    return _generate_structured(settings, AutomationFlowOutput, _FLOW_SCHEMA, context)
 
 
 def generate_fix(settings: Settings, *, context: str) -> AutomationFixOutput:
-    client = OpenAI(api_key=settings.openai_api_key)
-    json_schema = _build_json_schema(AutomationFixOutput)
-    response = client.responses.create(
-        model=settings.openai_model,
-        temperature=settings.openai_temperature,
-        max_output_tokens=settings.openai_max_output_tokens,
-        input=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": build_user_prompt(context)},
-        ],
-        text={"format": {"type": "json_schema", **json_schema}},
-    )
-    output_text = response.output_text
-    return AutomationFixOutput.model_validate_json(output_text)
+    return _generate_structured(settings, AutomationFixOutput, _FIX_SCHEMA, context)
 
 
 def generate_simplification(settings: Settings, *, context: str) -> AutomationSimplificationOutput:
-    client = OpenAI(api_key=settings.openai_api_key)
-    json_schema = _build_json_schema(AutomationSimplificationOutput)
-    response = client.responses.create(
-        model=settings.openai_model,
-        temperature=settings.openai_temperature,
-        max_output_tokens=settings.openai_max_output_tokens,
-        input=[
-            {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": build_user_prompt(context)},
-        ],
-        text={"format": {"type": "json_schema", **json_schema}},
-    )
-    output_text = response.output_text
-    return AutomationSimplificationOutput.model_validate_json(output_text)
+    return _generate_structured(settings, AutomationSimplificationOutput, _SIMPLIFICATION_SCHEMA, context)
@@ -0,0 +1,68 @@
+from __future__ import annotations
+
+import json
+import os
+from typing import Any, Dict, List, Tuple
+
+import orjson
+
+from app.audit import get_audit_writer
+from app.config import Settings
+from app.idempotency import get_idempotency_store
+
+
+def _encode_report(payload: Dict[str, Any]) -> bytes:
+    try:
+        return orjson.dumps(payload, option=orjson.OPT_INDENT_2)
+    except orjson.JSONEncodeError:
+        return json.dumps(payload, ensure_ascii=True, indent=2).encode("utf-8")
+
+
+class PersistenceBatch:
+    def __init__(self, settings: Settings) -> None:
+        self._settings = settings
+        self._reports: List[Tuple[str, bytes]] = []
+        self._audit_records: List[Dict[str, Any]] = []
+        self._action_keys: List[str] = []
+
+    def add_report(self, trace_id: str, payload: Dict[str, Any]) -> str:
+        path = os.path.join(self._settings.reports_dir, f"automation_{trace_id}.json")
+        self._reports.append((path, _encode_report(payload)))
+        return path
+
+    def add_audit(self, record: Dict[str, Any]) -> None:
+        self._audit_records.append(record)
+
+    def add_processed(self, action_key: str) -> None:
+        self._action_keys.append(action_key)
+
+    def commit(self) -> None:
+        fsync = self._settings.persist_fsync
+        if self._reports:
+            os.makedirs(self._settings.reports_dir, exist_ok=True)
+        for path, body in self._reports:
+            with open(path, "wb") as handle:
+                handle.write(body)
+                if fsync:
+                    handle.flush()
+                    os.fsync(handle.fileno())
+
+        if self._audit_records:
+            writer = get_audit_writer(self._settings.audit_log_path)
+            for record in self._audit_records:
+                writer.write(record)
+            if fsync:
+                writer.sync()
+            else:
+                writer.flush()
+
+        if self._action_keys:
+            store = get_idempotency_store(self._settings.data_dir)
+            for action_key in self._action_keys:
+                store.mark_processed(action_key)
+            if fsync:
+                store.sync()
+
+        self._reports.clear()
+        self._audit_records.clear()
+        self._action_keys.clear()
@@ -1,48 +1,67 @@
 from __future__ import annotations
 
+import sys
 from typing import Any, Dict
 
 from app.models import AutomationFixOutput, AutomationFlowOutput, AutomationSimplificationOutput
 
 
+_DEFAULT_GOAL = sys.intern("Automacao solicitada")
+_DEFAULT_CONTEXT = sys.intern("OPERACAO")
+_DEFAULT_SOURCE = sys.intern("GHL")
+_DEFAULT_DESCRIPTION = sys.intern("Falha de integracao")
+_DEFAULT_ISSUE = sys.intern("EXCESSO_AUTOMACAO")
+_MEDIO = sys.intern("MEDIO")
+_ALTO = sys.intern("ALTO")
+_ALTA = sys.intern("ALTA")
+_MEDIA = sys.intern("MEDIA")
+_DEFAULT_SYSTEMS = ("GHL",)
+_TAG_APPLIED_TRIGGER = "Tag aplicada no GHL"
+_DEFAULT_CONDITIONS = ("Dados minimos presentes", "Nao duplicar execucao")
+_DEFAULT_ACTIONS = ("Atualizar campo no GHL", "Disparar webhook para Make")
+_DEFAULT_FIX_SUGGESTION = "Revisar credenciais e mapeamento de campos no fluxo."
+_DEFAULT_SIMPLIFICATION_RECOMMENDATION = "Reduzir o numero de gatilhos e consolidar etapas do fluxo."
+_PRIORITY_BY_IMPACT = {_ALTO: _ALTA}
+
+
 def _safe_text(value: Any) -> str:
     if value is None:
         return ""
+    if type(value) is str:
+        return value.strip()
     return str(value).strip()
 
 
 def build_flow(payload: Dict[str, Any]) -> AutomationFlowOutput:
-    goal = _safe_text(payload.get("goal")) or "Automacao solicitada"
-    context = _safe_text(payload.get("context")) or "OPERACAO"
-    systems = payload.get("systems") or ["GHL"]
-    triggers = [f"Evento {context} recebido", "Tag aplicada no GHL"]
-    conditions = ["Dados minimos presentes", "Nao duplicar execucao"]
-    actions = ["Atualizar campo no GHL", "Disparar webhook para Make"]
+    goal = _safe_text(payload.get("goal")) or _DEFAULT_GOAL
+    context = _safe_text(payload.get("context")) or _DEFAULT_CONTEXT
+    systems = payload.get("systems")
+    systems_used = tuple(map(str.upper, map(str, filter(None, systems)))) if systems else _DEFAULT_SYSTEMS
     return AutomationFlowOutput(
         workflow_summary=f"Fluxo para {goal} no contexto {context}.",
-        triggers=triggers,
-        conditions=conditions,
-        actions=actions,
-        systems_used=[str(s).upper() for s in systems if s],
+        triggers=(f"Evento {context} recebido", _TAG_APPLIED_TRIGGER),
+        conditions=_DEFAULT_CONDITIONS,
+        actions=_DEFAULT_ACTIONS,
+        systems_used=systems_used,
     )
 
 
 def build_fix(payload: Dict[str, Any]) -> AutomationFixOutput:
-    source = _safe_text(payload.get("source")) or "GHL"
-    desc = _safe_text(payload.get("description")) or "Falha de integracao"
-    impact = _safe_text(payload.get("impact")).upper() or "MEDIO"
-    priority = "ALTA" if impact == "ALTO" else "MEDIA"
+    source = _safe_text(payload.get("source")) or _DEFAULT_SOURCE
+    desc = _safe_text(payload.get("description")) or _DEFAULT_DESCRIPTION
+    impact = _safe_text(payload.get("impact")).upper() or _MEDIO
+    priority = _PRIORITY_BY_IMPACT.get(impact, _MEDIA)
     return AutomationFixOutput(
         root_cause=f"Falha detectada em {source}: {desc}.",
-        suggested_fix="Revisar credenciais e mapeamento de campos no fluxo.",
+        suggested_fix=_DEFAULT_FIX_SUGGESTION,
         priority=priority,
     )
 
 
 def build_simplification(payload: Dict[str, Any]) -> AutomationSimplificationOutput:
-    context = _safe_text(payload.get("context")) or "OPERACAO"
+    context = _safe_text(payload.get("context")) or _DEFAULT_CONTEXT
     return AutomationSimplificationOutput(
         area=context,
-        issue="EXCESSO_AUTOMACAO",
-        recommendation="Reduzir o numero de gatilhos e consolidar etapas do fluxo.",
+        issue=_DEFAULT_ISSUE,
+        recommendation=_DEFAULT_SIMPLIFICATION_RECOMMENDATION,
     )
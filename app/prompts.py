@@ -33,5 +33,8 @@ Retorne JSON valido que corresponde ao schema.
 """
 
 
+_USER_PREFIX = "Context:\n"
+
+
 def build_user_prompt(context: str) -> str:
-    return "Context:\n" + context
+    return _USER_PREFIX + context
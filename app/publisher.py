@@ -1,11 +1,33 @@
 from __future__ import annotations
 
-import time
-from typing import Any, Dict, Optional
+import asyncio
+import random
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
 
-import requests
+import httpx
+import orjson
 
-from app.utils import model_validate
+from app.utils import hash_canonical, model_validate
+
+
+_REQUIRED_FIELDS = frozenset(("name", "source", "location_id", "payload"))
+_DEDUP_MAX_ENTRIES = 1024
+_RETRYABLE_CLIENT_STATUSES = frozenset((408, 429))
+
+
+def _is_retryable_status(status_code: int) -> bool:
+    return status_code >= 500 or status_code in _RETRYABLE_CLIENT_STATUSES
+
+
+PUBLISH_SKIPPED = object()
+
+
+def _without_volatile_fields(event_draft: Dict[str, Any]) -> Dict[str, Any]:
+    payload = event_draft.get("payload")
+    if not isinstance(payload, dict) or "timestamp" not in payload:
+        return event_draft
+    return {**event_draft, "payload": {key: value for key, value in payload.items() if key != "timestamp"}}
 
 
 class MaestroPublisher:
@@ -13,31 +35,89 @@ class MaestroPublisher:
         self._base_url = base_url.rstrip("/")
         self._timeout_s = timeout_s
         self._retries = retries
+        self._headers = {"Content-Type": "application/json"}
+        self._last_digests: OrderedDict[Tuple[Any, ...], str] = OrderedDict()
+        self._client = httpx.AsyncClient(
+            base_url=self._base_url,
+            timeout=timeout_s,
+            http2=True,
+            limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+        )
 
-    def publish_event(self, event_draft: Dict[str, Any], dma_rules: Any) -> Optional[Dict[str, Any]]:
+    async def publish_event(self, event_draft: Any, dma_rules: Any, dedup_scope: str = "") -> Any:
         event_model = getattr(dma_rules, "EventDraft", None)
         if event_model is not None:
-            model_validate(event_model, event_draft)
+            if isinstance(event_draft, event_model):
+                event_draft = event_draft.model_dump(mode="json")
+            else:
+                model_validate(event_model, event_draft)
         else:
-            required_fields = ("name", "source", "location_id", "payload")
-            missing = [field for field in required_fields if field not in event_draft]
+            missing = _REQUIRED_FIELDS.difference(event_draft)
             if missing:
-                raise ValueError(f"Invalid event_draft: missing fields {missing}")
+                raise ValueError(f"Invalid event_draft: missing fields {sorted(missing)}")
+
+        dedup_key: Optional[Tuple[Any, ...]] = None
+        digest = ""
+        if dedup_scope:
+            dedup_key = (
+                dedup_scope,
+                event_draft.get("name"),
+                event_draft.get("source"),
+                event_draft.get("location_id"),
+            )
+            digest = hash_canonical(_without_volatile_fields(event_draft))
+            if self._last_digests.get(dedup_key) == digest:
+                return PUBLISH_SKIPPED
 
-        url = f"{self._base_url}/events/publish"
+        body = orjson.dumps(event_draft)
         last_error: Optional[Exception] = None
         for attempt in range(self._retries + 1):
             try:
-                response = requests.post(url, json=event_draft, timeout=self._timeout_s)
+                response = await self._client.post("/events/publish", content=body, headers=self._headers)
                 response.raise_for_status()
+                result = None
                 if response.content:
-                    return response.json()
-                return None
-            except requests.RequestException as exc:
+                    try:
+                        result = orjson.loads(response.content)
+                    except orjson.JSONDecodeError:
+                        result = None
+                if dedup_key is not None:
+                    self._remember_digest(dedup_key, digest)
+                return result
+            except (httpx.HTTPStatusError, httpx.TransportError) as exc:
+                if isinstance(exc, httpx.HTTPStatusError) and not _is_retryable_status(exc.response.status_code):
+                    raise
                 last_error = exc
                 if attempt >= self._retries:
                     break
-                time.sleep(0.8 * (attempt + 1))
+                await asyncio.sleep(random.uniform(0, min(8.0, 0.2 * (2 ** attempt))))
         if last_error:
             raise last_error
         return None
+
+    def _remember_digest(self, dedup_key: Tuple[Any, ...], digest: str) -> None:
+        self._last_digests[dedup_key] = digest
+        self._last_digests.move_to_end(dedup_key)
+        if len(self._last_digests) > _DEDUP_MAX_ENTRIES:
+            self._last_digests.popitem(last=False)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+_publishers: Dict[str, MaestroPublisher] = {}
+
+
+def get_publisher(base_url: str) -> MaestroPublisher:
+    publisher = _publishers.get(base_url)
+    if publisher is None:
+        publisher = MaestroPublisher(base_url)
+        _publishers[base_url] = publisher
+    return publisher
+
+
+async def close_publishers() -> None:
+    publishers = list(_publishers.values())
+    _publishers.clear()
+    for publisher in publishers:
+        await publisher.aclose()
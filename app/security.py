@@ -1,21 +1,34 @@
-from fastapi import Header, HTTPException, Request, status
+import hmac
+from typing import Optional
+
+from fastapi import Header, HTTPException, status
 
 from app.config import get_settings
 
 
+_expected_key: Optional[bytes] = None
+
+
+def init_internal_key() -> None:
+    global _expected_key
+    key = get_settings().internal_agent_api_key
+    _expected_key = key.encode("utf-8") if key else None
+
+
 async def verify_internal_key(
-    request: Request,
     x_internal_agent_api_key: str | None = Header(None, alias="x-internal-agent-api-key"),
     x_internal_key: str | None = Header(None, alias="X-Internal-Key"),
 ) -> None:
-    settings = get_settings()
-    if not settings.internal_agent_api_key:
+    if _expected_key is None:
+        init_internal_key()
+    expected = _expected_key
+    if expected is None:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Internal agent key not configured.",
         )
-    candidate = x_internal_agent_api_key or x_internal_key or request.headers.get("x-internal-agent-api-key", "")
-    if candidate != settings.internal_agent_api_key:
+    candidate = x_internal_agent_api_key or x_internal_key or ""
+    if not hmac.compare_digest(candidate.encode("utf-8"), expected):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid internal key.",
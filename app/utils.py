@@ -1,16 +1,33 @@
 from __future__ import annotations
 
 import hashlib
-import json
 from typing import Any, Dict, Type
 
+import orjson
 
-def sha256_text(value: str) -> str:
-    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+def hash_bytes(value: bytes) -> str:
+    return hashlib.blake2b(value, digest_size=32).hexdigest()
+
+
+def hash_text(value: str) -> str:
+    return hash_bytes(value.encode("utf-8"))
 
 
 def canonical_json(data: Dict[str, Any]) -> str:
-    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=True)
+    return orjson.dumps(data).decode("utf-8")
+
+
+def canonical_json_bytes(data: Dict[str, Any]) -> bytes:
+    return orjson.dumps(data, option=orjson.OPT_SORT_KEYS)
+
+
+def canonical_json_sorted(data: Dict[str, Any]) -> str:
+    return canonical_json_bytes(data).decode("utf-8")
+
+
+def hash_canonical(data: Dict[str, Any]) -> str:
+    return hash_bytes(canonical_json_bytes(data))
 
 
 def model_validate(model: Type[Any], data: Any) -> Any: